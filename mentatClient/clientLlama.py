@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
 
@@ -26,6 +27,10 @@ server_ip = config.get("LLAMA_SERVER_IP", "10.8.162.58")
 server_port = config.get("LLAMA_SERVER_PORT", "5001")
 SERVER_URL = f"http://{server_ip}:{server_port}/chat"
 
+# Keep one connection alive across chat turns instead of reconnecting per message
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
 def send_message(message, history=None):
     if history is None:
         history = []
@@ -36,7 +41,7 @@ def send_message(message, history=None):
     }
     
     try:
-        response = requests.post(SERVER_URL, json=data, timeout=30)
+        response = SESSION.post(SERVER_URL, json=data, timeout=30)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
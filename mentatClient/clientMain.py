@@ -3,12 +3,33 @@ import asyncio
 import websockets
 import websockets.exceptions
 import json
-import base64
 import numpy as np
-from datetime import datetime
 import time
 import threading
 import os
+import itertools
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# libjpeg-turbo bindings are optional - OpenCV's encoder is used when they are missing
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+except ImportError:
+    TurboJPEG = None
+
+# uvloop is optional - the default asyncio event loop is used when it is missing
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Baseline 4:2:0 JPEG: half the chroma work of 4:4:4 and no extra optimize/progressive passes
+JPEG_ENCODE_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 0, cv2.IMWRITE_JPEG_PROGRESSIVE, 0]
+if hasattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR"):
+    JPEG_ENCODE_PARAMS += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420]
+
+# Use TCP for RTSP and keep FFmpeg's jitter and reorder buffers small (override with RTSP_CAPTURE_OPTIONS)
+DEFAULT_RTSP_CAPTURE_OPTIONS = "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay|max_delay;500000|reorder_queue_size;0"
 
 def load_config():
     """Load configuration from config.env"""
@@ -33,7 +54,7 @@ def load_config():
                     if "#" in value:
                         value = value.split("#")[0].strip()
                     
-                    if key in ["SERVER_IP", "SERVER_PORT"]:
+                    if key in ["SERVER_IP", "SERVER_PORT", "YOLO_SEND_THRESHOLD", "BLIP_SEND_THRESHOLD", "MAX_IN_FLIGHT", "RTSP_CAPTURE_OPTIONS"]:
                         config[key] = value
                 
                 except ValueError:
@@ -93,12 +114,88 @@ def get_enabled_cameras():
     print(f"📹 Enabled cameras: {list(cameras.keys())}")
     return cameras
 
+class FrameGrabber:
+    """Reads a camera in a background thread and keeps only the latest frame"""
+    
+    # Frames are grabbed as they arrive but only converted to BGR this often (seconds)
+    MAX_FRAME_AGE = 0.05
+    
+    def __init__(self, camera_name, cap):
+        self.camera_name = camera_name
+        self.cap = cap
+        self.lock = threading.Lock()
+        self.latest_frame = None
+        self.frame_id = 0  # Increments with every retrieved frame
+        self.failures = 0
+        self.running = True
+        self.release_on_exit = False  # Set when release() gave up waiting on a blocked grab()
+        self.exited = False
+        
+        self.thread = threading.Thread(target=self.grab_loop, daemon=True)
+        self.thread.start()
+    
+    def grab_loop(self):
+        """Grab frames as they arrive so the sender never waits on the camera"""
+        last_retrieve = 0.0
+        while self.running:
+            ret = self.cap.grab()
+            
+            # Most frames are never sent - skip the decode/BGR conversion unless the latest one is getting old
+            frame = None
+            if ret:
+                now = time.monotonic()
+                if now - last_retrieve < self.MAX_FRAME_AGE:
+                    continue
+                ret, frame = self.cap.retrieve()
+                last_retrieve = now
+            
+            with self.lock:
+                if ret:
+                    self.latest_frame = frame
+                    self.frame_id += 1
+                    self.failures = 0
+                else:
+                    self.failures += 1
+            
+            if not ret:
+                time.sleep(0.01)
+        
+        # release() timed out while grab() was blocked - release the capture now that it is no longer in use
+        with self.lock:
+            self.exited = True
+            release = self.release_on_exit
+        if release:
+            self.cap.release()
+    
+    def read(self):
+        """Get the most recent frame (ret, frame, frame_id)"""
+        with self.lock:
+            return self.latest_frame is not None, self.latest_frame, self.frame_id
+    
+    def release(self):
+        """Stop the grab thread and release the camera"""
+        self.running = False
+        self.thread.join(timeout=1.0)
+        
+        # Never release the capture under a grab() still in progress; the grab thread does it on exit
+        with self.lock:
+            if self.thread.is_alive() and not self.exited:
+                self.release_on_exit = True
+                return
+        self.cap.release()
+
 class MultiCameraClient:
     def __init__(self):
         # Load configuration
         self.config = load_config()
         self.cameras = get_enabled_cameras()
         
+        # FFmpeg reads its capture options when each capture is opened; an explicit environment variable wins
+        os.environ.setdefault(
+            "OPENCV_FFMPEG_CAPTURE_OPTIONS",
+            self.config.get("RTSP_CAPTURE_OPTIONS", DEFAULT_RTSP_CAPTURE_OPTIONS)
+        )
+        
         if not self.cameras:
             raise ValueError("No cameras enabled. Check config.env file.")
         
@@ -106,22 +203,45 @@ class MultiCameraClient:
         self.websockets = {}
         self.connected = {}
         
+        # Replies are matched to requests by request_id; the receiver task resolves these futures
+        self.request_ids = itertools.count(1)
+        self.pending_replies = {}
+        
+        # Requests each expert sender may have outstanding, so the next frame is sent while a reply is pending
+        self.max_in_flight = max(1, int(self.config.get("MAX_IN_FLIGHT", 2)))
+        
         # Data storage for each camera (minimal - just for logging)
         self.yolo_data = {}
         self.blip_data = {}
         
-        # Performance tracking
-        self.last_yolo_time = {}
-        self.last_blip_time = {}
+        # Performance tracking - next send deadlines on the monotonic clock
+        self.next_yolo_time = {}
+        self.next_blip_time = {}
         self.yolo_interval = 0.2  # 200ms between YOLO detections (5 FPS)
         self.blip_interval = 3.0  # 3 seconds between BLIP captions
         
+        # Skip sends while the scene is static (mean abs diff of a small thumbnail, 0 disables)
+        self.send_thresholds = {
+            "YOLO": float(self.config.get("YOLO_SEND_THRESHOLD", 0)),  # Off by default - YOLO frames also feed the dashboard video
+            "BLIP": float(self.config.get("BLIP_SEND_THRESHOLD", 3.0))
+        }
+        self.max_skip = {"YOLO": 1.0, "BLIP": 30.0}  # Resend at least this often even if nothing changed
+        self.last_sent_thumbs = {}
+        self.last_sent_times = {}
+        
         # Camera status tracking
         self.camera_status = {}
         
         # Processing scale (will be updated from server)
         self.processing_scale = 0.5
         
+        # JPEG encoding runs here so it never blocks the event loop (libjpeg releases the GIL)
+        # Up to two encodes per camera (YOLO and BLIP) can run at once, capped at the core count
+        encode_threads = max(2, min(2 * len(self.cameras), os.cpu_count() or 2))
+        self.encode_pool = ThreadPoolExecutor(max_workers=encode_threads, thread_name_prefix="jpeg-encode")
+        self.encoded_frames = {}  # Last (frame_id, encode future) per camera, shared by YOLO and BLIP
+        self.turbo_jpeg = self.load_turbo_jpeg()
+        
         # Initialize data structures for each camera
         for camera_name in self.cameras:
             self.yolo_data[camera_name] = {
@@ -135,8 +255,8 @@ class MultiCameraClient:
                 "fps": 0
             }
             self.connected[camera_name] = False
-            self.last_yolo_time[camera_name] = 0
-            self.last_blip_time[camera_name] = 0
+            self.next_yolo_time[camera_name] = 0
+            self.next_blip_time[camera_name] = 0
             self.camera_status[camera_name] = {"working": True, "failures": 0}
         
         print("🖥️ Client window preview: DISABLED (web streaming only)")
@@ -152,7 +272,8 @@ class MultiCameraClient:
             server_port = self.config["SERVER_PORT"]
             
             server_url = f"ws://{server_ip}:{server_port}"
-            self.websockets[camera_name] = await websockets.connect(server_url)
+            # JPEG payloads do not compress - skip permessage-deflate on every frame
+            self.websockets[camera_name] = await websockets.connect(server_url, compression=None)
             self.connected[camera_name] = True
             print(f"🔌 Camera {camera_name} connected to server: {server_url}")
             return True
@@ -163,7 +284,10 @@ class MultiCameraClient:
     def open_camera(self, camera_name, camera_source):
         """Open camera (webcam or RTSP stream)"""
         try:
-            cap = cv2.VideoCapture(camera_source)
+            if isinstance(camera_source, int):
+                cap = cv2.VideoCapture(camera_source)
+            else:
+                cap = self.open_rtsp_capture(camera_source)
 
             # Set properties for better performance
             if isinstance(camera_source, int):
@@ -173,15 +297,16 @@ class MultiCameraClient:
                 target_width = int(base_width * self.processing_scale)
                 target_height = int(base_height * self.processing_scale)
 
+                # Ask for MJPG so USB cameras deliver compressed frames instead of raw YUYV
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
                 cap.set(cv2.CAP_PROP_FRAME_WIDTH, target_width)
                 cap.set(cv2.CAP_PROP_FRAME_HEIGHT, target_height)
                 cap.set(cv2.CAP_PROP_FPS, 30)
                 cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             else:
-                # RTSP settings - keep original resolution but optimize buffering
-                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                cap.set(cv2.CAP_PROP_FPS, 25)
+                # RTSP buffering is set through OPENCV_FFMPEG_CAPTURE_OPTIONS (FFmpeg ignores CAP_PROP_BUFFERSIZE)
                 # Don't force resolution for RTSP - let it use native resolution
+                pass
 
             if not cap.isOpened():
                 print(f"❌ Failed to open camera {camera_name} ({camera_source})")
@@ -197,7 +322,52 @@ class MultiCameraClient:
             print(f"❌ Error opening camera {camera_name}: {e}")
             return None
     
-    async def send_frame_to_expert(self, camera_name, frame, expert_type):
+    def load_turbo_jpeg(self):
+        """Load libjpeg-turbo for faster encoding if PyTurboJPEG is installed"""
+        if TurboJPEG is None:
+            return None
+        
+        try:
+            turbo_jpeg = TurboJPEG()
+            print("✅ Using libjpeg-turbo for JPEG encoding")
+            return turbo_jpeg
+        except Exception as e:
+            print(f"⚠️  libjpeg-turbo unavailable, using OpenCV encoder: {e}")
+            return None
+    
+    def open_rtsp_capture(self, camera_source):
+        """Open an RTSP stream with hardware-accelerated decoding, falling back to software"""
+        # CAP_PROP_HW_ACCELERATION needs OpenCV 4.5.2+ built with FFmpeg hwaccel support
+        if hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            cap = cv2.VideoCapture(camera_source, cv2.CAP_FFMPEG,
+                                   [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+            if cap.isOpened():
+                return cap
+            cap.release()
+            print(f"⚠️  Hardware decoding unavailable for {camera_source}, using software decoder")
+        
+        return cv2.VideoCapture(camera_source, cv2.CAP_FFMPEG)
+    
+    def encode_frame(self, frame):
+        """Encode a frame as JPEG (a bytes-like buffer, not copied into a bytes object)"""
+        if self.turbo_jpeg is not None:
+            return self.turbo_jpeg.encode(frame, quality=85, jpeg_subsample=TJSAMP_420)
+        
+        _, buffer = cv2.imencode('.jpg', frame, JPEG_ENCODE_PARAMS)
+        return memoryview(buffer)
+    
+    async def get_encoded_frame(self, camera_name, frame, frame_id):
+        """Encode a frame once and share the JPEG between experts sending the same frame"""
+        cached = self.encoded_frames.get(camera_name)
+        if frame_id is None or cached is None or cached[0] != frame_id:
+            loop = asyncio.get_running_loop()
+            cached = (frame_id, loop.run_in_executor(self.encode_pool, self.encode_frame, frame))
+            self.encoded_frames[camera_name] = cached
+        
+        # Shield so a cancelled sender never cancels an encode the other expert is waiting on
+        return await asyncio.shield(cached[1])
+    
+    async def send_frame_to_expert(self, camera_name, frame, expert_type, frame_id=None):
         """Send frame to specific expert through central server"""
         if not self.connected[camera_name] or camera_name not in self.websockets:
             return
@@ -207,95 +377,159 @@ class MultiCameraClient:
             # This ensures client and server are in sync
             frame_resized = frame  # No resizing on client side
             
-            # Encode frame as base64
-            _, buffer = cv2.imencode('.jpg', frame_resized, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
+            # Encode frame as JPEG on the encode pool (shared if the other expert sends this frame too)
+            loop = asyncio.get_running_loop()
+            jpeg_bytes = await self.get_encoded_frame(camera_name, frame_resized, frame_id)
             
-            # Create message with expert type and camera info
-            message = {
+            # Binary message: JSON header with expert type and camera info, newline, raw JPEG (no base64)
+            request_id = next(self.request_ids)
+            header = {
                 "expert": expert_type,
                 "camera_id": camera_name,  # Use camera name as ID
-                "frame": frame_base64
+                "request_id": request_id
             }
+            message = b"".join((json.dumps(header).encode('utf-8'), b"\n", jpeg_bytes))
             
-            # Send message
-            await self.websockets[camera_name].send(json.dumps(message))
-            
-            # Wait for response
-            timeout = 5.0 if expert_type == "BLIP" else 2.0
-            response = await asyncio.wait_for(self.websockets[camera_name].recv(), timeout=timeout)
-            results = json.loads(response)
-            
-            # Handle response based on expert type
-            if expert_type == "YOLO" and "error" not in results:
-                self.yolo_data[camera_name]["detections"] = results.get("detections", [])
-                self.yolo_data[camera_name]["person_detections"] = results.get("person_detections", [])
-                self.yolo_data[camera_name]["person_count"] = results.get("person_count", 0)
-                self.yolo_data[camera_name]["fps"] = results.get("fps", 0)
-                
-                if self.yolo_data[camera_name]["detections"]:
-                    labels = [f"{d['class']} ({d['confidence']:.2f})" for d in self.yolo_data[camera_name]["detections"]]
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    print(f"🎯 Camera {camera_name} - {timestamp} - {', '.join(labels)} (FPS: {self.yolo_data[camera_name]['fps']}, Persons: {self.yolo_data[camera_name]['person_count']})")
-                    
-            elif expert_type == "BLIP" and "error" not in results:
-                self.blip_data[camera_name]["caption"] = results.get("caption", "")
-                self.blip_data[camera_name]["fps"] = results.get("fps", 0)
+            # Send message, then wait for the receiver task to resolve this request's reply
+            reply = loop.create_future()
+            self.pending_replies[camera_name][request_id] = reply
+            try:
+                await self.websockets[camera_name].send(message)
                 
-                if self.blip_data[camera_name]["caption"]:
-                    timestamp = datetime.now().strftime("%H:%M:%S")
-                    print(f"📝 Camera {camera_name} - {timestamp} - {self.blip_data[camera_name]['caption']} (FPS: {self.blip_data[camera_name]['fps']})")
-                    
-            elif "error" in results:
-                print(f"❌ Camera {camera_name} {expert_type} error: {results['error']}")
+                timeout = 5.0 if expert_type == "BLIP" else 2.0
+                await asyncio.wait_for(reply, timeout=timeout)
+            finally:
+                # Late replies to a timed-out request are simply dropped
+                self.pending_replies[camera_name].pop(request_id, None)
                     
         except asyncio.TimeoutError:
             print(f"⏰ Camera {camera_name} {expert_type} timeout")
         except websockets.exceptions.ConnectionClosed:
-            print(f"🔌 Camera {camera_name} connection closed, attempting to reconnect...")
+            # The receiver task notices the closed socket and reconnects
             self.connected[camera_name] = False
-            # Try to reconnect
-            await self.connect_to_server(camera_name)
         except Exception as e:
             print(f"❌ Camera {camera_name} {expert_type} error: {e}")
     
+    def handle_expert_result(self, camera_name, results):
+        """Store an expert reply and resolve the request waiting for it"""
+        expert_type = results.get("expert", "")
+        
+        # Handle response based on expert type
+        if expert_type == "YOLO" and "error" not in results:
+            self.yolo_data[camera_name]["detections"] = results.get("detections", [])
+            self.yolo_data[camera_name]["person_detections"] = results.get("person_detections", [])
+            self.yolo_data[camera_name]["person_count"] = results.get("person_count", 0)
+            self.yolo_data[camera_name]["fps"] = results.get("fps", 0)
+            
+            if self.yolo_data[camera_name]["detections"]:
+                labels = [f"{d['class']} ({d['confidence']:.2f})" for d in self.yolo_data[camera_name]["detections"]]
+                timestamp = time.strftime("%H:%M:%S")
+                print(f"🎯 Camera {camera_name} - {timestamp} - {', '.join(labels)} (FPS: {self.yolo_data[camera_name]['fps']}, Persons: {self.yolo_data[camera_name]['person_count']})")
+                
+        elif expert_type == "BLIP" and "error" not in results:
+            caption = results.get("caption", "")
+            caption_changed = caption != self.blip_data[camera_name]["caption"]
+            self.blip_data[camera_name]["caption"] = caption
+            self.blip_data[camera_name]["fps"] = results.get("fps", 0)
+            
+            # Static scenes repeat the same caption - only log when it changes
+            if caption and caption_changed:
+                timestamp = time.strftime("%H:%M:%S")
+                print(f"📝 Camera {camera_name} - {timestamp} - {self.blip_data[camera_name]['caption']} (FPS: {self.blip_data[camera_name]['fps']})")
+                
+        elif "error" in results:
+            print(f"❌ Camera {camera_name} {expert_type or 'server'} error: {results['error']}")
+        
+        reply = self.pending_replies[camera_name].pop(results.get("request_id"), None)
+        if reply is not None and not reply.done():
+            reply.set_result(results)
+    
+    async def receive_loop(self, camera_name):
+        """Read every reply on a camera's connection and reconnect when it drops"""
+        while self.camera_status[camera_name]["working"]:
+            websocket = self.websockets.get(camera_name)
+            
+            if self.connected[camera_name] and websocket is not None:
+                try:
+                    async for response in websocket:
+                        # A bad reply must not kill the receiver - every pending request would time out
+                        try:
+                            self.handle_expert_result(camera_name, json.loads(response))
+                        except Exception as e:
+                            print(f"❌ Camera {camera_name} bad reply from server: {e}")
+                except websockets.exceptions.ConnectionClosed:
+                    pass
+                
+                print(f"🔌 Camera {camera_name} connection closed, attempting to reconnect...")
+                self.connected[camera_name] = False
+            
+            # Try to reconnect
+            if not await self.connect_to_server(camera_name):
+                await asyncio.sleep(1.0)
+    
+    async def expert_sender(self, camera_name, expert_type, frame_queue):
+        """Send the newest queued frame to one expert, pipelining up to max_in_flight requests"""
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        sends = set()
+        
+        async def send(frame, frame_id):
+            try:
+                await self.send_frame_to_expert(camera_name, frame, expert_type, frame_id)
+            finally:
+                in_flight.release()
+        
+        while True:
+            # Wait for a free slot first so the frame taken afterwards is the newest one
+            await in_flight.acquire()
+            frame, frame_id = await frame_queue.get()
+            
+            task = asyncio.create_task(send(frame, frame_id))
+            sends.add(task)
+            task.add_done_callback(sends.discard)
+    
+    def offer_frame(self, frame_queue, frame, frame_id):
+        """Queue a frame for an expert sender, replacing any frame it has not picked up yet"""
+        if frame_queue.full():
+            frame_queue.get_nowait()
+        frame_queue.put_nowait((frame, frame_id))
+    
     def start_resolution_listener(self):
-        """Start listening for resolution updates from server"""
+        """Set up the keep-alive HTTP session used to poll for resolution updates"""
         try:
-            import threading
             import requests
+            from requests.adapters import HTTPAdapter
             
-            def listen_for_updates():
-                """Background thread to listen for resolution updates"""
-                while True:
-                    try:
-                        # Poll server for resolution updates
-                        response = requests.get(f"http://{self.config['SERVER_IP']}:5002/api/resolution/current", 
-                                             timeout=5)
-                        if response.status_code == 200:
-                            data = response.json()
-                            self.update_resolution_settings(data)
-                        
-                        # Also poll for AI model states
-                        response = requests.get(f"http://{self.config['SERVER_IP']}:5002/api/models", 
-                                             timeout=5)
-                        if response.status_code == 200:
-                            data = response.json()
-                            self.update_ai_model_states(data)
-                            
-                    except Exception as e:
-                        pass  # Silent fail for background polling
-                    
-                    time.sleep(10)  # Check every 10 seconds
-            
-            # Start background thread
-            thread = threading.Thread(target=listen_for_updates, daemon=True)
-            thread.start()
-            print("📡 Resolution listener started")
+            # Reuse one keep-alive connection instead of a new TCP handshake per poll
+            self.http = requests.Session()
+            self.http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
             
         except Exception as e:
+            self.http = None
             print(f"❌ Error starting resolution listener: {e}")
     
+    async def listen_for_updates(self):
+        """Poll the server for resolution and AI model states on the event loop"""
+        if self.http is None:
+            return
+        
+        print("📡 Resolution listener started")
+        
+        loop = asyncio.get_running_loop()
+        url = f"http://{self.config['SERVER_IP']}:5002/api/client/settings"
+        while True:
+            try:
+                # Only the blocking HTTP call leaves the loop; settings are applied on the loop thread
+                response = await loop.run_in_executor(None, functools.partial(self.http.get, url, timeout=5))
+                if response.status_code == 200:
+                    data = response.json()
+                    self.update_resolution_settings(data)
+                    self.update_ai_model_states(data)
+                    
+            except Exception as e:
+                pass  # Silent fail for background polling
+            
+            await asyncio.sleep(10)  # Check every 10 seconds
+    
     def update_resolution_settings(self, settings):
         """Update resolution settings from server"""
         try:
@@ -324,23 +558,122 @@ class MultiCameraClient:
             return True  # Default to enabled if we don't know
         return self.ai_model_states.get(model_name.lower(), {}).get('enabled', True)
 
+    def make_thumbnail(self, frame, expert_type):
+        """Small uint8 thumbnail used to tell whether a frame is worth sending"""
+        if expert_type == "BLIP":
+            return cv2.resize(frame, (32, 24), interpolation=cv2.INTER_AREA)
+        
+        # A strided view costs almost nothing, which matters at the YOLO send rate
+        return np.ascontiguousarray(frame[::8, ::8])
+
+    def is_scene_changed(self, camera_name, expert_type, frame, current_time):
+        """Check whether a frame differs enough from the last one sent to an expert to be worth sending"""
+        threshold = self.send_thresholds[expert_type]
+        if threshold <= 0:
+            return True
+        
+        key = (camera_name, expert_type)
+        thumb = self.make_thumbnail(frame, expert_type)
+        last_thumb = self.last_sent_thumbs.get(key)
+        stale = current_time - self.last_sent_times.get(key, 0) >= self.max_skip[expert_type]
+        
+        if (last_thumb is not None and not stale and last_thumb.shape == thumb.shape
+                and cv2.absdiff(thumb, last_thumb).mean() < threshold):
+            return False
+        
+        self.last_sent_thumbs[key] = thumb
+        self.last_sent_times[key] = current_time
+        return True
+
+    def next_deadline(self, deadline, interval, now):
+        """Advance a send deadline by one interval, resetting it if the loop fell behind"""
+        deadline += interval
+        if deadline <= now:
+            deadline = now + interval
+        return deadline
+
+    async def camera_loop(self, camera_name, grabber):
+        """Hand one camera's frames to the enabled experts at their intervals"""
+        last_yolo_frame_id = 0
+        last_blip_frame_id = 0
+        
+        # Each expert gets its own sender so a slow BLIP reply never holds up YOLO
+        frame_queues = {"YOLO": asyncio.Queue(maxsize=1), "BLIP": asyncio.Queue(maxsize=1)}
+        self.pending_replies[camera_name] = {}
+        tasks = [asyncio.create_task(self.receive_loop(camera_name))]
+        tasks += [
+            asyncio.create_task(self.expert_sender(camera_name, expert_type, frame_queue))
+            for expert_type, frame_queue in frame_queues.items()
+        ]
+        
+        try:
+            while self.camera_status[camera_name]["working"]:
+                current_time = time.monotonic()
+                
+                self.camera_status[camera_name]["failures"] = grabber.failures
+                if grabber.failures > 10:
+                    print(f"❌ Camera {camera_name} failed too many times, disabling")
+                    self.camera_status[camera_name]["working"] = False
+                    break
+                
+                yolo_enabled = self.is_model_enabled("yolo")
+                blip_enabled = self.is_model_enabled("blip")
+                
+                # Take the latest decoded frame (never blocks on the camera)
+                ret, frame, frame_id = grabber.read()
+                if ret:
+                    # Send frames only to enabled AI models, and never the same frame twice
+                    if (yolo_enabled and frame_id != last_yolo_frame_id
+                            and current_time >= self.next_yolo_time[camera_name]):
+                        if self.is_scene_changed(camera_name, "YOLO", frame, current_time):
+                            self.offer_frame(frame_queues["YOLO"], frame, frame_id)
+                        self.next_yolo_time[camera_name] = self.next_deadline(
+                            self.next_yolo_time[camera_name], self.yolo_interval, current_time
+                        )
+                        last_yolo_frame_id = frame_id
+                    
+                    if (blip_enabled and frame_id != last_blip_frame_id
+                            and current_time >= self.next_blip_time[camera_name]):
+                        if self.is_scene_changed(camera_name, "BLIP", frame, current_time):
+                            self.offer_frame(frame_queues["BLIP"], frame, frame_id)
+                        self.next_blip_time[camera_name] = self.next_deadline(
+                            self.next_blip_time[camera_name], self.blip_interval, current_time
+                        )
+                        last_blip_frame_id = frame_id
+                
+                # Sleep until the next send is due instead of spinning (10ms floor while waiting for a new frame)
+                deadlines = []
+                if yolo_enabled:
+                    deadlines.append(self.next_yolo_time[camera_name])
+                if blip_enabled:
+                    deadlines.append(self.next_blip_time[camera_name])
+                next_wakeup = min(deadlines, default=current_time + 0.1)
+                await asyncio.sleep(max(0.01, next_wakeup - time.monotonic()))
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            
+            # Joining the grab thread can wait on a blocked RTSP read - keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, grabber.release)
+
     async def run_async(self):
         """Main async loop - pure camera feeder mode"""
         # Connect to server for each camera
         for camera_name in self.cameras:
             await self.connect_to_server(camera_name)
         
-        # Initialize video captures
-        caps = {}
+        # Initialize video captures, each read by its own grab thread
+        grabbers = {}
         for camera_name, camera_source in self.cameras.items():
             cap = self.open_camera(camera_name, camera_source)
             if cap is None:
                 self.camera_status[camera_name]["working"] = False
                 continue
             
-            caps[camera_name] = cap
+            grabbers[camera_name] = FrameGrabber(camera_name, cap)
         
-        if not caps:
+        if not grabbers:
             print("❌ No cameras could be opened. Check your configuration.")
             return
         
@@ -348,53 +681,36 @@ class MultiCameraClient:
         print("📡 Sending frames to server for AI processing and web display.")
         print("Press Ctrl+C to quit.")
         
-        while True:
-            current_time = time.time()
-            
-            # Process each camera
-            for camera_name in self.cameras:
-                if camera_name not in caps or not self.camera_status[camera_name]["working"]:
-                    continue
-                    
-                cap = caps[camera_name]
-                
-                ret, frame = cap.read()
-                if not ret:
-                    self.camera_status[camera_name]["failures"] += 1
-                    if self.camera_status[camera_name]["failures"] > 10:
-                        print(f"❌ Camera {camera_name} failed too many times, disabling")
-                        self.camera_status[camera_name]["working"] = False
-                        cap.release()
-                        del caps[camera_name]
-                    continue
-                
-                # Reset failure count on successful read
-                self.camera_status[camera_name]["failures"] = 0
-                
-                # Send frames only to enabled AI models
-                if self.is_model_enabled("yolo") and current_time - self.last_yolo_time[camera_name] >= self.yolo_interval:
-                    await self.send_frame_to_expert(camera_name, frame, "YOLO")
-                    self.last_yolo_time[camera_name] = current_time
-                
-                if self.is_model_enabled("blip") and current_time - self.last_blip_time[camera_name] >= self.blip_interval:
-                    await self.send_frame_to_expert(camera_name, frame, "BLIP")
-                    self.last_blip_time[camera_name] = current_time
-            
-            # Small sleep to prevent busy waiting
-            await asyncio.sleep(0.01)
+        # Settings polling shares the event loop with the camera tasks
+        listener = asyncio.create_task(self.listen_for_updates())
         
-        # Cleanup
-        for cap in caps.values():
-            cap.release()
+        # Each camera runs as its own task so a slow reply on one never stalls the others
+        await asyncio.gather(*(
+            self.camera_loop(camera_name, grabber) for camera_name, grabber in grabbers.items()
+        ))
+        
+        listener.cancel()
+        try:
+            await listener
+        except asyncio.CancelledError:
+            pass
         
         # Close WebSocket connections
         for websocket in self.websockets.values():
             await websocket.close()
+        
+        self.encode_pool.shutdown(wait=False)
 
 def main():
     try:
         client = MultiCameraClient()
-        asyncio.run(client.run_async())
+        
+        # libuv-based loop for cheaper socket send/recv, scoped to this run (no global loop policy)
+        if uvloop is not None:
+            print("✅ Using uvloop event loop")
+            uvloop.run(client.run_async())
+        else:
+            asyncio.run(client.run_async())
     except ValueError as e:
         print(f"❌ {e}")
         print("💡 To enable cameras, edit config.env and uncomment the cameras you want to use.")
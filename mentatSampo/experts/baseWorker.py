@@ -1,16 +1,28 @@
 import asyncio
+import functools
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 class BaseWorker(ABC):
     """Base class for all expert workers"""
     
-    def __init__(self, worker_name, config):
+    def __init__(self, worker_name, config, max_batch_size=1):
         self.name = worker_name
         self.config = config
         
-        # Create async queue for this worker
-        self.job_queue = asyncio.Queue(maxsize=100)  # Limit queue size to prevent memory issues
+        # Create async queue for this worker - kept short so queued frames never go stale
+        queue_size = int(config.get("WORKER_QUEUE_SIZE", 10))
+        self.job_queue = asyncio.Queue(maxsize=queue_size)
+        
+        # Maximum number of queued jobs handed to process_batch at once
+        self.max_batch_size = max(1, max_batch_size)
+        
+        # Per-frame diagnostics (e.g. dropped frames) are only printed when debugging
+        self.debug_logging = config.get("DEBUG_LOGGING", "false").lower() == "true"
+        
+        # Model calls run on one dedicated thread so inference never blocks the event loop
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{worker_name}-inference")
         
         # Performance tracking
         self.frame_count = 0
@@ -29,25 +41,32 @@ class BaseWorker(ABC):
     async def process_loop(self):
         """Main processing loop - pulls jobs from queue"""
         while True:
+            jobs = []
             try:
-                # Get job from queue
-                job = await self.job_queue.get()
-                
-                # Process the frame
-                result = await self.process_frame(job)
-                
-                # Update timing
-                self.frame_count += 1
+                # Wait for a job, then take whatever else is already queued (e.g. other cameras)
+                jobs.append(await self.job_queue.get())
+                while len(jobs) < self.max_batch_size and not self.job_queue.empty():
+                    jobs.append(self.job_queue.get_nowait())
                 
-                # Send result back through the callback
-                if "callback" in job:
-                    await job["callback"](job["camera_id"], self.name, result)
+                # Process the frames together
+                results = await self.process_batch(jobs)
                 
-                self.job_queue.task_done()
+                for job, result in zip(jobs, results):
+                    # Update timing
+                    self.frame_count += 1
+                    
+                    # Send result back through the callback - one failing client must not cost the others their reply
+                    if job.get("callback"):
+                        try:
+                            await job["callback"](job["camera_id"], self.name, result)
+                        except Exception as e:
+                            print(f"❌ {self.name} Worker callback error for camera {job['camera_id']}: {e}")
                 
             except Exception as e:
                 print(f"❌ {self.name} Worker error: {e}")
-                self.job_queue.task_done()
+            finally:
+                for _ in jobs:
+                    self.job_queue.task_done()
     
     async def add_job(self, camera_id, frame, callback=None):
         """Add a job to the worker's queue"""
@@ -59,12 +78,33 @@ class BaseWorker(ABC):
         }
         
         try:
-            # Non-blocking put - drop frame if queue is full
+            # Non-blocking put
             self.job_queue.put_nowait(job)
             return True
         except asyncio.QueueFull:
-            print(f"⚠️  {self.name} Worker queue full, dropping frame for camera {camera_id}")
-            return False
+            # Queue is full - drop the oldest frame, the newest one is more useful
+            dropped_job = self.job_queue.get_nowait()
+            self.job_queue.task_done()
+            self.job_queue.put_nowait(job)
+            if self.debug_logging:
+                print(f"⚠️  {self.name} Worker queue full, dropping oldest frame for camera {dropped_job['camera_id']}")
+            
+            # Answer the dropped request right away so the client frees its in-flight slot
+            if dropped_job.get("callback"):
+                try:
+                    await dropped_job["callback"](dropped_job["camera_id"], self.name, {
+                        "error": "Frame dropped (worker queue full)",
+                        "dropped": True,
+                        "camera_id": dropped_job["camera_id"]
+                    })
+                except Exception as e:
+                    print(f"❌ {self.name} Worker callback error for camera {dropped_job['camera_id']}: {e}")
+            return True
+    
+    async def run_in_worker_thread(self, func, *args, **kwargs):
+        """Run a blocking model call on this worker's inference thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
     
     def get_stats(self):
         """Get worker statistics"""
@@ -82,6 +122,10 @@ class BaseWorker(ABC):
         """Initialize the AI model - implement in each worker"""
         pass
     
+    async def process_batch(self, jobs):
+        """Process several queued jobs - override to run them in a single model call"""
+        return [await self.process_frame(job) for job in jobs]
+    
     @abstractmethod
     async def process_frame(self, job):
         """Process a single frame - implement in each worker"""
@@ -2,9 +2,18 @@
 import cv2
 import numpy as np
 import os
+import time
+import contextlib
+import importlib.util
+
+# Keep torch.compile artifacts on disk so server restarts reuse the compiled encoder
+os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.expanduser("~/.cache/mentat/torchinductor"))
+
 import torch
-from transformers import BlipProcessor, BlipForConditionalGeneration
+from transformers import BlipProcessor, BlipForConditionalGeneration, BitsAndBytesConfig
 from .baseWorker import BaseWorker
+from utils.motion import average_hash, hamming_distance
 
 # Suppress warnings
 import warnings
@@ -15,73 +24,296 @@ class BLIPWorker(BaseWorker):
     """BLIP expert worker that processes image captioning jobs"""
     
     def __init__(self, config):
-        super().__init__("BLIP", config)
+        # Frames from different cameras share one generate() call, up to BLIP_BATCH_SIZE
+        super().__init__("BLIP", config, max_batch_size=max(1, int(config.get("BLIP_BATCH_SIZE", 4))))
         self.model = None
         self.processor = None
         self.device = "cpu"
+        
+        # Preprocessing constants taken from the BLIP processor at load time
+        self.input_size = (384, 384)
+        self.pixel_mean = None
+        self.pixel_std = None
+        
+        # Pinned host buffer reused for every upload, plus an event marking when its last copy finished
+        self.staging_buffer = None
+        self.staging_event = None
+        
+        # Dedicated CUDA stream so BLIP's copies and kernels overlap with YOLO on the default stream
+        self.cuda_stream = None
+        
+        # Caption generation settings - greedy by default, beam search cost grows with beams x length
+        num_beams = max(1, int(self.config.get("BLIP_NUM_BEAMS", 1)))
+        self.generation_kwargs = {
+            "max_length": int(self.config.get("BLIP_MAX_LENGTH", 30)),
+            "num_beams": num_beams,
+            "do_sample": False,
+            "no_repeat_ngram_size": 3,
+            # Keep decoder key/values between steps instead of recomputing the prefix
+            "use_cache": True
+        }
+        
+        # early_stopping only affects beam search
+        if num_beams > 1:
+            self.generation_kwargs["early_stopping"] = True
+        
+        # Skip captioning when a camera's aHash moved by fewer bits than this (0 disables)
+        self.change_threshold = int(self.config.get("BLIP_CHANGE_THRESHOLD", 5))
+        self.last_hashes = {}
+        self.last_captions = {}
+        
+        # Re-caption at least this often (seconds) even if the aHash says nothing changed (0 = never)
+        self.max_caption_age = float(self.config.get("BLIP_MAX_CAPTION_AGE", 30))
+        self.last_caption_times = {}
     
     async def initialize_model(self):
         """Initialize the BLIP model"""
         model_name = self.config.get("BLIP_MODEL_NAME", "Salesforce/blip-image-captioning-base")
         use_gpu = self.config.get("USE_GPU", "true").lower() == "true"
         cuda_device = self.config.get("CUDA_DEVICE", "cuda")
+        compile_model = self.config.get("BLIP_COMPILE", "true").lower() == "true"
+        compile_mode = self.config.get("BLIP_COMPILE_MODE", "reduce-overhead")
+        compile_backend = self.config.get("BLIP_COMPILE_BACKEND", "inductor").lower()
+        quantize = self.config.get("BLIP_QUANTIZE", "none").lower()
         
         try:
+            use_cuda = use_gpu and torch.cuda.is_available()
+            dtype = self.select_dtype(use_cuda, quantize, cuda_device)
+            
+            # int8 on GPU needs bitsandbytes; fall back to the regular weights without it
+            load_in_8bit = use_cuda and quantize == "int8"
+            if load_in_8bit and importlib.util.find_spec("bitsandbytes") is None:
+                print("⚠️  BLIP_QUANTIZE=int8 on GPU requires bitsandbytes, loading without quantization")
+                load_in_8bit = False
+            
             # Load BLIP model and processor
             self.processor = BlipProcessor.from_pretrained(model_name)
-            self.model = BlipForConditionalGeneration.from_pretrained(model_name)
             
             # Move to GPU if available and enabled
-            if use_gpu and torch.cuda.is_available():
+            if load_in_8bit:
+                # bitsandbytes places the int8 weights on the GPU itself
+                self.device = cuda_device
+                self.model = BlipForConditionalGeneration.from_pretrained(
+                    model_name,
+                    torch_dtype=dtype,
+                    quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+                    device_map={"": self.device}
+                )
+                print(f"✅ BLIP model loaded on GPU ({dtype}, int8 linear layers): {model_name}")
+            elif use_cuda:
+                self.model = BlipForConditionalGeneration.from_pretrained(model_name, torch_dtype=dtype)
                 self.device = cuda_device
                 self.model = self.model.to(self.device)
-                print(f"✅ BLIP model loaded on GPU: {model_name}")
+                print(f"✅ BLIP model loaded on GPU ({dtype}): {model_name}")
             else:
+                self.model = BlipForConditionalGeneration.from_pretrained(model_name, torch_dtype=dtype)
                 self.device = "cpu"
-                print(f"✅ BLIP model loaded on CPU: {model_name}")
+                
+                # Optional int8 weights: only the vision encoder is quantized, the text decoder keeps fp32 weights
+                if quantize == "int8":
+                    self.model.vision_model = torch.ao.quantization.quantize_dynamic(
+                        self.model.vision_model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                
+                print(f"✅ BLIP model loaded on CPU ({dtype}{', int8 encoder' if quantize == 'int8' else ''}): {model_name}")
+            
+            self.model.eval()
+            
+            # Cache resize/normalize settings so frames can skip the HF processor
+            # Mean/std live on the model device, pre-scaled to 0-255 so uint8 frames normalize in one step
+            image_processor = self.processor.image_processor
+            self.input_size = (image_processor.size["width"], image_processor.size["height"])
+            self.pixel_mean = torch.tensor(image_processor.image_mean, device=self.device).view(1, 3, 1, 1) * 255
+            self.pixel_std = torch.tensor(image_processor.image_std, device=self.device).view(1, 3, 1, 1) * 255
+            
+            # BLIP's own stream starts after the weights and constants written on the default stream
+            if self.device != "cpu":
+                self.cuda_stream = torch.cuda.Stream(device=self.device)
+                self.cuda_stream.wait_stream(torch.cuda.current_stream(self.device))
+            
+            # Compile the vision encoder on GPU - its input shape never changes (bitsandbytes layers do not compile)
+            if compile_model and self.device != "cpu" and not load_in_8bit:
+                # Compile and capture on the inference thread that will replay the graphs
+                await self.run_in_worker_thread(self.compile_model, compile_mode, compile_backend)
                 
         except Exception as e:
             print(f"❌ Error loading BLIP model: {e}")
             raise e
     
-    async def process_frame(self, job):
-        """Process a frame with BLIP image captioning"""
+    def select_dtype(self, use_cuda, quantize, cuda_device="cuda"):
+        """Pick the BLIP weight dtype the current hardware actually runs fast"""
+        if use_cuda:
+            # fp16 only pays off with tensor cores (Volta, compute capability 7.0+)
+            major, _ = torch.cuda.get_device_capability(torch.device(cuda_device))
+            return torch.float16 if major >= 7 else torch.float32
+        
+        # bf16 on CPUs with native support; dynamic int8 quantization needs fp32 weights
+        bf16_check = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+        if quantize != "int8" and bf16_check is not None and bf16_check():
+            return torch.bfloat16
+        return torch.float32
+    
+    def compile_model(self, mode="reduce-overhead", backend="inductor"):
+        """Compile the BLIP vision encoder and warm it up before the first frame"""
+        eager_forward = self.model.vision_model.forward
+        
+        if backend == "tensorrt" and importlib.util.find_spec("torch_tensorrt") is None:
+            print("⚠️  BLIP_COMPILE_BACKEND=tensorrt requires torch-tensorrt, using inductor")
+            backend = "inductor"
+        
         try:
-            frame = job["frame"]
-            camera_id = job["camera_id"]
-            
-            if self.model is None or self.processor is None:
-                return {"error": "BLIP model not loaded"}
+            if backend == "tensorrt":
+                # Importing torch_tensorrt registers the backend; engines are built per batch size during warmup
+                import torch_tensorrt  # noqa: F401
+                
+                self.model.vision_model.forward = torch.compile(
+                    eager_forward, backend="tensorrt", dynamic=False,
+                    options={"enabled_precisions": {self.model.dtype}}
+                )
+                mode = "TensorRT"
+            else:
+                self.model.vision_model.forward = torch.compile(
+                    eager_forward, mode=mode, dynamic=False
+                )
             
-            # Convert BGR to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Two dummy passes per batch size so every shape is compiled and captured at startup
+            dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+            with torch.no_grad(), self.inference_stream():
+                for batch_size in range(1, self.max_batch_size + 1):
+                    pixel_values = self.preprocess_frames([dummy_frame] * batch_size)
+                    for _ in range(2):
+                        self.model.vision_model(pixel_values=pixel_values)
             
-            # Process image with BLIP
-            inputs = self.processor(frame_rgb, return_tensors="pt")
+            print(f"✅ BLIP vision encoder compiled with torch.compile ({mode})")
             
-            # Move inputs to device
+        except Exception as e:
+            print(f"⚠️  BLIP torch.compile failed, using eager mode: {e}")
+            self.model.vision_model.forward = eager_forward
+    
+    def preprocess_frames(self, frames):
+        """Resize, convert and normalize BGR frames straight into a pixel_values tensor"""
+        # Frames stay BGR here; the resize writes straight into the reusable staging buffer
+        frames_uint8 = self.stage_frames(frames)
+        
+        # Upload the uint8 BGR frames (a quarter of the float32 bytes), flip to RGB and normalize on the device
+        pixel_values = frames_uint8.to(self.device, non_blocking=True).permute(0, 3, 1, 2).flip(1).float()
+        
+        if self.staging_event is not None:
+            self.staging_event.record()
+        
+        return pixel_values.sub_(self.pixel_mean).div_(self.pixel_std).to(self.model.dtype)
+    
+    def stage_frames(self, frames):
+        """Write resized BGR frames into the reusable staging buffer and return the filled slice"""
+        width, height = self.input_size
+        
+        # Allocate the buffer once, sized for the largest batch (pinned on GPU for async uploads)
+        if self.staging_buffer is None or self.staging_buffer.shape[1:3] != (height, width):
+            self.staging_buffer = torch.empty(
+                (self.max_batch_size, height, width, 3), dtype=torch.uint8
+            )
             if self.device != "cpu":
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                self.staging_buffer = self.staging_buffer.pin_memory()
+                self.staging_event = torch.cuda.Event()
+        elif self.staging_event is not None:
+            # The previous upload may still be reading the buffer
+            self.staging_event.synchronize()
+        
+        staging = self.staging_buffer.numpy()
+        for i, frame in enumerate(frames):
+            cv2.resize(frame, self.input_size, dst=staging[i], interpolation=cv2.INTER_AREA)
+        
+        return self.staging_buffer[:len(frames)]
+    
+    def caption_frames(self, frames):
+        """Preprocess frames and generate their captions in a single generate() call"""
+        with torch.no_grad(), self.inference_stream():
+            pixel_values = self.preprocess_frames(frames)
+            out = self.model.generate(pixel_values=pixel_values, **self.generation_kwargs)
+            return self.processor.batch_decode(out, skip_special_tokens=True)
+    
+    def inference_stream(self):
+        """Run the enclosed GPU work on BLIP's own CUDA stream (no-op on CPU)"""
+        if self.cuda_stream is None:
+            return contextlib.nullcontext()
+        return torch.cuda.stream(self.cuda_stream)
+    
+    def is_scene_unchanged(self, camera_id, frame_hash):
+        """Check whether a frame looks like the last captioned frame of its camera"""
+        last_hash = self.last_hashes.get(camera_id)
+        if last_hash is None or camera_id not in self.last_captions:
+            return False
+        
+        # Slow changes (lighting, a parked car) can stay under the bit threshold - refresh old captions
+        if self.max_caption_age > 0 and time.monotonic() - self.last_caption_times.get(camera_id, 0) >= self.max_caption_age:
+            return False
+        
+        return hamming_distance(frame_hash, last_hash) < self.change_threshold
+    
+    def caption_changed_frames(self, frames, camera_ids):
+        """Caption frames whose scene changed in one batch, reusing the last caption for the rest"""
+        captions = [None] * len(frames)
+        frame_hashes = [None] * len(frames)
+        pending = []
+        
+        # Reuse the last caption for cameras whose scene has not changed
+        for i, (frame, camera_id) in enumerate(zip(frames, camera_ids)):
+            if self.change_threshold > 0:
+                frame_hashes[i] = average_hash(frame)
+                if self.is_scene_unchanged(camera_id, frame_hashes[i]):
+                    captions[i] = self.last_captions[camera_id]
+                    continue
+            pending.append(i)
+        
+        if pending:
+            # Caption the remaining frames as one batch
+            new_captions = self.caption_frames([frames[i] for i in pending])
+            
+            for i, caption in zip(pending, new_captions):
+                camera_id = camera_ids[i]
+                captions[i] = caption
+                self.last_captions[camera_id] = caption
+                self.last_hashes[camera_id] = frame_hashes[i]
+                self.last_caption_times[camera_id] = time.monotonic()
+        
+        return captions
+    
+    async def process_frame(self, job):
+        """Process a frame with BLIP image captioning"""
+        results = await self.process_batch([job])
+        return results[0]
+    
+    async def process_batch(self, jobs):
+        """Caption all queued frames with a single generate() call"""
+        try:
+            if self.model is None or self.processor is None:
+                return [{"error": "BLIP model not loaded"} for _ in jobs]
             
-            # Generate caption
-            with torch.no_grad():
-                out = self.model.generate(**inputs, max_length=50, num_beams=5)
-                caption = self.processor.decode(out[0], skip_special_tokens=True)
+            # Hashing, the change gate and generate() all run on the inference thread, off the event loop
+            captions = await self.run_in_worker_thread(
+                self.caption_changed_frames, [job["frame"] for job in jobs], [job["camera_id"] for job in jobs]
+            )
             
             # Get current stats
             stats = self.get_stats()
             
-            return {
-                "caption": caption,
-                "fps": stats["fps"],
-                "camera_id": camera_id
-            }
+            return [
+                {
+                    "caption": caption,
+                    "fps": stats["fps"],
+                    "camera_id": job["camera_id"]
+                }
+                for job, caption in zip(jobs, captions)
+            ]
             
         except Exception as e:
             print(f"❌ BLIP Worker error processing frame: {e}")
-            return {
-                "error": str(e),
-                "caption": "",
-                "fps": 0,
-                "camera_id": job.get("camera_id", 0)
-            } 
\ No newline at end of file
+            return [
+                {
+                    "error": str(e),
+                    "caption": "",
+                    "fps": 0,
+                    "camera_id": job.get("camera_id", 0)
+                }
+                for job in jobs
+            ]
\ No newline at end of file
@@ -1,19 +1,35 @@
 import cv2
+import json
 import numpy as np
 import os
+import time
+import torch
 from ultralytics import YOLO
 from .baseWorker import BaseWorker
+from utils.motion import gray_thumbnail, frame_difference
 
 class YOLOWorker(BaseWorker):
     """YOLO expert worker that processes object detection jobs"""
     
     def __init__(self, config):
-        super().__init__("YOLO", config)
+        super().__init__("YOLO", config, max_batch_size=max(1, int(config.get("YOLO_BATCH_SIZE", 4))))
         self.model = None
+        self.class_names = {}
+        self.person_class_ids = set()
+        self.half = False
+        
+        # Reuse a camera's last detections while its 32x32 gray thumbnail moves less than this (0 disables)
+        self.change_threshold = float(self.config.get("YOLO_CHANGE_THRESHOLD", 2.0))
+        # Run YOLO at least this often (seconds) per camera even on a static scene
+        self.max_detection_age = float(self.config.get("YOLO_MAX_DETECTION_AGE", 1.0))
+        self.last_thumbs = {}
+        self.last_detection_times = {}
+        self.last_detections = {}
     
     async def initialize_model(self):
         """Initialize the YOLO model"""
         model_path = self.config.get("YOLO_MODEL_PATH", "modelsYolo/yolo11m.pt")
+        use_gpu = self.config.get("USE_GPU", "true").lower() == "true"
         
         if not os.path.exists(model_path):
             print(f"❌ YOLO model not found at {model_path}")
@@ -21,74 +37,189 @@ class YOLOWorker(BaseWorker):
         
         try:
             self.model = YOLO(model_path)
-            print(f"✅ YOLO model loaded: {model_path}")
+            
+            # Optionally swap in an exported backend (e.g. engine = TensorRT, onnx = ONNX Runtime)
+            export_format = self.config.get("YOLO_EXPORT_FORMAT", "none").lower()
+            use_export = export_format not in ("", "none", "pt", "torch")
+            if use_export:
+                self.model = await self.run_in_worker_thread(
+                    self.load_exported_model, model_path, export_format, use_gpu and torch.cuda.is_available()
+                )
+            
+            # Resolve class names once instead of per detected box
+            self.class_names = dict(self.model.names)
+            self.person_class_ids = {
+                class_id for class_id, class_name in self.class_names.items()
+                if class_name.lower() == "person"
+            }
+            
+            # Half precision on GPU halves memory traffic; CPU stays in fp32
+            self.half = use_gpu and torch.cuda.is_available()
+            
+            print(f"✅ YOLO model loaded: {model_path} ({export_format if use_export else 'pytorch'}, {'fp16' if self.half else 'fp32'})")
                 
         except Exception as e:
             print(f"❌ Error loading YOLO model: {e}")
             raise e
     
-    async def process_frame(self, job):
-        """Process a frame with YOLO object detection"""
+    def load_exported_model(self, model_path, export_format, use_cuda):
+        """Export the YOLO weights once (reusing a matching previous export) and load the exported model"""
+        int8 = self.config.get("YOLO_EXPORT_INT8", "false").lower() == "true"
+        export_args = {
+            "format": export_format,
+            "half": use_cuda and not int8,
+            "int8": int8,
+            # Dynamic batch so one engine serves every batch size up to YOLO_BATCH_SIZE
+            "dynamic": True,
+            "batch": self.max_batch_size,
+        }
+        if int8:
+            # Post-training calibration images for int8
+            export_args["data"] = self.config.get("YOLO_EXPORT_DATA", "coco8.yaml")
+        if use_cuda:
+            export_args["device"] = torch.device(self.config.get("CUDA_DEVICE", "cuda")).index or 0
+        
+        # An explicit export path is loaded as-is
+        exported_path = self.config.get("YOLO_EXPORT_PATH", "")
+        if exported_path:
+            return YOLO(exported_path, task="detect")
+        
+        # Otherwise a manifest next to the weights records where the last export went and how it was built
+        manifest_path = os.path.splitext(model_path)[0] + f".{export_format}.export.json"
+        manifest = {}
+        if os.path.exists(manifest_path):
+            try:
+                with open(manifest_path, "r") as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+        
+        exported_path = manifest.get("path", "")
+        if manifest.get("args") != export_args or not os.path.exists(exported_path):
+            # Batch size, precision or device changed (or first run) - an old engine would fail on larger batches
+            print(f"🔧 Exporting YOLO model to {export_format} (this can take minutes)...")
+            exported_path = str(self.model.export(**export_args))
+            with open(manifest_path, "w") as f:
+                json.dump({"path": exported_path, "args": export_args}, f)
+            print(f"✅ YOLO model exported: {exported_path}")
+        
+        return YOLO(exported_path, task="detect")
+    
+    async def process_batch(self, jobs):
+        """Run YOLO on frames from several cameras in one batched forward pass"""
+        if self.model is None:
+            return [self.error_result(job, "YOLO model not loaded") for job in jobs]
+        
         try:
-            frame = job["frame"]
-            camera_id = job["camera_id"]
-            
-            if self.model is None:
-                return {"error": "YOLO model not loaded"}
-            
-            # Run YOLO detection
-            results = self.model(frame, verbose=False)
-            
-            # Extract detections
-            detections = []
-            person_detections = []
-            person_count = 0
-            
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Get bounding box coordinates
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        
-                        # Get class and confidence
-                        class_id = int(box.cls[0].cpu().numpy())
-                        confidence = float(box.conf[0].cpu().numpy())
-                        
-                        # Get class name
-                        class_name = self.model.names[class_id]
-                        
-                        detection = {
-                            "bbox": [float(x1), float(y1), float(x2), float(y2)],
-                            "class": class_name,
-                            "confidence": confidence,
-                            "class_id": class_id
-                        }
-                        detections.append(detection)
-                        
-                        # Count persons
-                        if class_name.lower() == "person":
-                            person_count += 1
-                            person_detections.append(detection)
+            # Change gate and inference both run on the inference thread, off the event loop
+            results = await self.run_in_worker_thread(
+                self.detect_frames, [job["frame"] for job in jobs], [job["camera_id"] for job in jobs]
+            )
             
             # Get current stats
             stats = self.get_stats()
             
-            return {
-                "detections": detections,
-                "person_detections": person_detections,
-                "person_count": person_count,
-                "fps": stats["fps"],
-                "camera_id": camera_id
-            }
+            replies = []
+            for job, result in zip(jobs, results):
+                camera_id = job["camera_id"]
+                if result is None:
+                    # Scene unchanged - repeat the camera's last detections
+                    reply = dict(self.last_detections[camera_id], fps=stats["fps"], camera_id=camera_id)
+                else:
+                    reply = self.format_result(result, camera_id, stats)
+                    self.last_detections[camera_id] = reply
+                replies.append(reply)
+            
+            return replies
             
         except Exception as e:
             print(f"❌ YOLO Worker error processing frame: {e}")
-            return {
-                "error": str(e),
-                "detections": [],
-                "person_detections": [],
-                "person_count": 0,
-                "fps": 0,
-                "camera_id": job.get("camera_id", 0)
-            } 
\ No newline at end of file
+            return [self.error_result(job, str(e)) for job in jobs]
+    
+    def detect_frames(self, frames, camera_ids):
+        """Run YOLO on the frames whose scene changed; None marks frames whose cached detections still apply"""
+        results = [None] * len(frames)
+        pending = []
+        now = time.monotonic()
+        
+        for i, (frame, camera_id) in enumerate(zip(frames, camera_ids)):
+            thumb = gray_thumbnail(frame) if self.change_threshold > 0 else None
+            if thumb is not None and self.is_scene_unchanged(camera_id, thumb, now):
+                continue
+            pending.append((i, camera_id, thumb))
+        
+        if pending:
+            # A list input is letterboxed and stacked into one batch by ultralytics
+            batch_results = self.model([frames[i] for i, _, _ in pending], verbose=False, half=self.half)
+            
+            for (i, camera_id, thumb), result in zip(pending, batch_results):
+                results[i] = result
+                self.last_thumbs[camera_id] = thumb
+                self.last_detection_times[camera_id] = now
+        
+        return results
+    
+    def is_scene_unchanged(self, camera_id, thumb, now):
+        """Check whether a frame looks like the last frame YOLO ran on for its camera"""
+        last_thumb = self.last_thumbs.get(camera_id)
+        if last_thumb is None or camera_id not in self.last_detections:
+            return False
+        
+        if now - self.last_detection_times.get(camera_id, 0) >= self.max_detection_age:
+            return False
+        
+        return frame_difference(thumb, last_thumb) < self.change_threshold
+    
+    async def process_frame(self, job):
+        """Process a frame with YOLO object detection"""
+        results = await self.process_batch([job])
+        return results[0]
+    
+    def format_result(self, result, camera_id, stats):
+        """Convert one ultralytics result into the detection reply sent to clients"""
+        detections = []
+        person_detections = []
+        person_count = 0
+        
+        boxes = result.boxes
+        if boxes is not None and len(boxes) > 0:
+            # Copy each box tensor to the CPU once instead of once per box
+            all_coords = boxes.xyxy.cpu().numpy().tolist()
+            all_class_ids = boxes.cls.cpu().numpy().astype(int).tolist()
+            all_confidences = boxes.conf.cpu().numpy().tolist()
+            
+            for coords, class_id, confidence in zip(all_coords, all_class_ids, all_confidences):
+                # Get class name
+                class_name = self.class_names[class_id]
+                
+                detection = {
+                    "bbox": coords,
+                    "class": class_name,
+                    "confidence": confidence,
+                    "class_id": class_id
+                }
+                detections.append(detection)
+                
+                # Count persons
+                if class_id in self.person_class_ids:
+                    person_count += 1
+                    person_detections.append(detection)
+        
+        return {
+            "detections": detections,
+            "person_detections": person_detections,
+            "person_count": person_count,
+            "fps": stats["fps"],
+            "camera_id": camera_id
+        }
+    
+    def error_result(self, job, error):
+        """Empty detection reply carrying an error message"""
+        return {
+            "error": error,
+            "detections": [],
+            "person_detections": [],
+            "person_count": 0,
+            "fps": 0,
+            "camera_id": job.get("camera_id", 0)
+        }
\ No newline at end of file
@@ -10,6 +10,7 @@ from datetime import datetime
 from flask import Flask, render_template, jsonify, Response, request
 from flask_socketio import SocketIO, emit, join_room, leave_room
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from utils.resolution import (
     resize_frame_for_processing, 
     scale_bounding_boxes_for_display,
@@ -18,6 +19,10 @@ from utils.resolution import (
     get_processing_scale_from_config,
     validate_scale_factor
 )
+from utils.jpeg import encode_jpeg, decode_jpeg
+
+# CUDA allocator settings must be in place before the expert workers import torch
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:128")
 
 def load_config():
     """Load configuration from config.env"""
@@ -53,6 +58,17 @@ class CentralWebSocketServer:
         self.workers = {}
         self.results_cache = {}  # Store results per camera
         
+        # Per-frame debug prints are off by default - at frame rate they cost more than the work they describe
+        self.debug_logging = self.config.get("DEBUG_LOGGING", "false").lower() == "true"
+        
+        # Processing scale is parsed once and refreshed when the setting changes
+        self.processing_scale = validate_scale_factor(get_processing_scale_from_config(self.config))
+        
+        # JPEG decoding runs here so it never blocks the event loop (OpenCV releases the GIL)
+        self.decode_pool = ThreadPoolExecutor(
+            max_workers=int(self.config.get("DECODE_THREADS", 4)), thread_name_prefix="jpeg-decode"
+        )
+        
         # Performance tracking
         self.frame_count = 0
         self.start_time = time.time()
@@ -61,6 +77,8 @@ class CentralWebSocketServer:
         self.camera_data = {}
         self.camera_frames = {}
         self.latest_results = {}
+        self.camera_versions = {}  # Bumped on every new frame or result, so streams can skip unchanged output
+        self.stream_changed = threading.Condition()  # Notified on every bump so idle streams wake immediately
         
         # Flask app for web dashboard
         self.flask_app = Flask(__name__)
@@ -102,6 +120,7 @@ class CentralWebSocketServer:
                 data = request.get_json()
                 enabled = data.get('enabled', not AI_MODELS[model_name]['enabled'])
                 AI_MODELS[model_name]['enabled'] = enabled
+                self.notify_stream_change()
                 
                 print(f"🔧 {AI_MODELS[model_name]['name']}: {'enabled' if enabled else 'disabled'}")
                 
@@ -122,7 +141,7 @@ class CentralWebSocketServer:
             if camera_id in self.camera_data:
                 data = self.camera_data[camera_id]
                 # Only print if there are results
-                if data.get('results'):
+                if self.debug_logging and data.get('results'):
                     print(f"🔍 API: Camera {camera_id} has {len(data['results'])} expert results")
                 return jsonify(data)
             print(f"❌ Camera {camera_id} not found. Available: {list(self.camera_data.keys())}")
@@ -167,6 +186,9 @@ class CentralWebSocketServer:
                 old_value = self.config.get(setting, "not set")
                 self.config[setting] = str(value)
                 
+                if setting == 'PROCESSING_SCALE':
+                    self.processing_scale = validate_scale_factor(get_processing_scale_from_config(self.config))
+                
                 print(f"🔧 Updated config: {setting} = {old_value} -> {value}")
                 
                 # Update config file
@@ -200,6 +222,14 @@ class CentralWebSocketServer:
                 print(f"❌ Error getting resolution settings: {e}")
                 return jsonify({"error": str(e)}), 500
         
+        @self.flask_app.route('/api/client/settings')
+        def get_client_settings():
+            """Get everything the camera client polls for in a single request"""
+            return jsonify({
+                "PROCESSING_SCALE": self.processing_scale,
+                "models": AI_MODELS
+            })
+        
         @self.flask_app.route('/api/camera/<camera_id>/debug')
         def get_camera_debug(camera_id):
             """Debug endpoint to see raw camera data structure"""
@@ -265,43 +295,67 @@ class CentralWebSocketServer:
     
     def generate_frames(self, camera_id):
         """Generate video frames for web streaming"""
-        last_frame_time = 0
+        next_frame_time = time.monotonic()
         frame_interval = 0.2  # 5 FPS for web streaming (reduced from 10 FPS)
 
-        # Use processing scale for web display
-        processing_scale = get_processing_scale_from_config(self.config)
-
         # Ensure camera_id is string for consistency
         camera_id = str(camera_id)
+        
+        # Display-size buffer reused for every resize of this stream
+        display_buffer = None
+        last_stream_state = None
 
         while True:
-            current_time = time.time()
+            # Sleep until the stream's next slot, then until there is something new to show
+            remaining = next_frame_time - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            with self.stream_changed:
+                self.stream_changed.wait_for(
+                    lambda: camera_id in self.camera_frames and self.get_stream_state(camera_id) != last_stream_state,
+                    timeout=1.0
+                )
 
-            if camera_id in self.camera_frames and (current_time - last_frame_time) >= frame_interval:
-                frame = self.camera_frames[camera_id].copy()
+            if camera_id in self.camera_frames:
+                # Nothing new since the last streamed frame (wait timed out) - skip the resize, overlay and encode
+                stream_state = self.get_stream_state(camera_id)
+                if stream_state == last_stream_state:
+                    continue
+                last_stream_state = stream_state
+                model_states = stream_state[1]
+                
+                # Stored frames are already at the processing scale and are replaced, never modified
+                source = self.camera_frames[camera_id]
 
                 # Check if any AI models are enabled
-                any_models_enabled = any(AI_MODELS[model]['enabled'] for model in AI_MODELS)
+                any_models_enabled = any(model_states)
 
                 if any_models_enabled:
-                    # Only resize and draw overlays if AI models are enabled
-                    frame = resize_frame_for_processing(frame, processing_scale)
+                    # Detections are in stored-frame coordinates - draw them on a copy, no resize needed
+                    if display_buffer is None or display_buffer.shape != source.shape:
+                        display_buffer = np.empty_like(source)
+                    np.copyto(display_buffer, source)
+                    frame = display_buffer
                     self.draw_overlays_on_frame(frame, camera_id)
                 else:
                     # When no AI models are enabled, just resize for display (faster)
-                    # Use a fixed display scale for better performance
-                    display_scale = 0.5  # 50% for web display
-                    frame = resize_frame_for_processing(frame, display_scale)
+                    # Use a fixed display scale (50% of the camera frame, never upscaled) for better performance
+                    display_scale = min(1.0, 0.5 / self.processing_scale)
+                    frame = resize_frame_for_processing(source, display_scale, dst=display_buffer)
+                
+                if frame is not source:
+                    display_buffer = frame
 
                 # Encode frame as JPEG with lower quality for better performance
-                ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                if ret:
-                    frame_bytes = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                    last_frame_time = current_time
-
-            time.sleep(0.05)  # Small sleep to prevent busy waiting
+                frame_bytes = encode_jpeg(frame, quality=70)
+                if frame_bytes is not None:
+                    yield b"".join((b'--frame\r\n'
+                                    b'Content-Type: image/jpeg\r\n\r\n', frame_bytes, b'\r\n'))
+                    
+                    # Fixed-rate deadlines; after a stall (idle camera, slow viewer) restart from now instead of bursting
+                    next_frame_time += frame_interval
+                    if next_frame_time < time.monotonic():
+                        next_frame_time = time.monotonic() + frame_interval
     
     def draw_overlays_on_frame(self, frame, camera_id):
         """Draw YOLO detections on frame for web display (no BLIP captions)"""
@@ -319,7 +373,7 @@ class CentralWebSocketServer:
             detections = yolo_results['detections']
             
             # Get processing scale from config
-            processing_scale = get_processing_scale_from_config(self.config)
+            processing_scale = self.processing_scale
             
             # Get display frame dimensions
             display_shape = frame.shape
@@ -372,7 +426,11 @@ class CentralWebSocketServer:
         try:
             async for message in websocket:
                 if isinstance(message, bytes):
-                    await self.process_frame_message(websocket, message)
+                    # Binary frames with a JSON header start with '{'; raw JPEG starts with 0xFFD8
+                    if message.startswith(b"{"):
+                        await self.process_binary_frame_message(websocket, message)
+                    else:
+                        await self.process_frame_message(websocket, message)
                 else:
                     # Handle JSON messages (future: commands, status requests)
                     try:
@@ -391,9 +449,8 @@ class CentralWebSocketServer:
     async def process_frame_message(self, websocket, frame_bytes):
         """Process incoming frame from client (legacy binary protocol)"""
         try:
-            # Decode frame
-            nparr = np.frombuffer(frame_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Decode and scale frame on the decode pool
+            frame = await asyncio.get_running_loop().run_in_executor(self.decode_pool, self.decode_for_processing, frame_bytes)
             
             if frame is None:
                 await websocket.send(json.dumps({"error": "Invalid frame data"}))
@@ -404,6 +461,7 @@ class CentralWebSocketServer:
             
             # Store frame for web dashboard
             self.camera_frames[str(camera_id)] = frame
+            self.bump_camera_version(camera_id)
             
             # Route frame to all enabled workers
             await self.route_frame_to_workers(camera_id, frame, websocket)
@@ -415,7 +473,7 @@ class CentralWebSocketServer:
             await websocket.send(json.dumps({"error": str(e)}))
 
     async def process_json_frame_message(self, websocket, data):
-        """Process incoming frame from client (new JSON protocol)"""
+        """Process incoming frame from client (JSON protocol with base64 frame)"""
         try:
             # Extract data from JSON message
             expert_type = data.get("expert")
@@ -423,29 +481,76 @@ class CentralWebSocketServer:
             frame_base64 = data.get("frame")
             
             if not expert_type or not frame_base64:
-                await websocket.send(json.dumps({"error": "Missing expert type or frame data"}))
+                await websocket.send(json.dumps({
+                    "error": "Missing expert type or frame data",
+                    "expert": expert_type,
+                    "request_id": data.get("request_id")
+                }))
                 return
             
-            # Decode base64 frame
-            frame_bytes = base64.b64decode(frame_base64)
-            nparr = np.frombuffer(frame_bytes, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Decode base64 frame on the decode pool
+            frame_bytes = await asyncio.get_running_loop().run_in_executor(
+                self.decode_pool, base64.b64decode, frame_base64
+            )
+            await self.process_expert_frame(websocket, expert_type, camera_id, frame_bytes, data.get("request_id"))
             
-            if frame is None:
-                await websocket.send(json.dumps({"error": "Invalid frame data"}))
+        except Exception as e:
+            print(f"❌ Error processing JSON frame: {e}")
+            await websocket.send(json.dumps({"error": str(e), "expert": data.get("expert"), "request_id": data.get("request_id")}))
+
+    async def process_binary_frame_message(self, websocket, message):
+        """Process incoming frame from client (JSON header line followed by raw JPEG bytes)"""
+        header = {}
+        try:
+            header_end = message.find(b"\n")
+            if header_end < 0:
+                await websocket.send(json.dumps({"error": "Missing frame header"}))
                 return
             
-            # Store frame for web dashboard
-            self.camera_frames[str(camera_id)] = frame
+            header = json.loads(message[:header_end])
+            if not isinstance(header, dict):
+                header = {}
+                raise ValueError("Frame header must be a JSON object")
+            expert_type = header.get("expert")
+            camera_id = header.get("camera_id", 0)
+            request_id = header.get("request_id")
+            frame_bytes = memoryview(message)[header_end + 1:]
+            
+            if not expert_type or not frame_bytes:
+                await websocket.send(json.dumps({
+                    "error": "Missing expert type or frame data",
+                    "expert": expert_type,
+                    "request_id": request_id
+                }))
+                return
             
-            # Route frame to specific expert worker
-            await self.route_frame_to_expert(camera_id, frame, expert_type.lower(), websocket)
-            
-            self.frame_count += 1
+            await self.process_expert_frame(websocket, expert_type, camera_id, frame_bytes, request_id)
             
         except Exception as e:
-            print(f"❌ Error processing JSON frame: {e}")
-            await websocket.send(json.dumps({"error": str(e)}))
+            print(f"❌ Error processing binary frame: {e}")
+            # Echo whatever of the header was parsed so the client can fail the request immediately
+            await websocket.send(json.dumps({"error": str(e), "expert": header.get("expert"), "request_id": header.get("request_id")}))
+
+    def decode_for_processing(self, frame_bytes):
+        """Decode a JPEG frame and scale it to the processing resolution, once for every consumer"""
+        return resize_frame_for_processing(decode_jpeg(frame_bytes), self.processing_scale)
+
+    async def process_expert_frame(self, websocket, expert_type, camera_id, frame_bytes, request_id=None):
+        """Decode a JPEG frame and route it to the requested expert"""
+        frame = await asyncio.get_running_loop().run_in_executor(self.decode_pool, self.decode_for_processing, frame_bytes)
+        
+        if frame is None:
+            await websocket.send(json.dumps({"error": "Invalid frame data", "expert": expert_type, "request_id": request_id}))
+            return
+        
+        # Store frame for web dashboard
+        self.camera_frames[str(camera_id)] = frame
+        self.bump_camera_version(camera_id)
+        
+        # Route frame to specific expert worker
+        await self.route_frame_to_expert(camera_id, frame, expert_type.lower(), websocket, request_id)
+        
+        self.frame_count += 1
 
     async def route_frame_to_workers(self, camera_id, frame, websocket):
         """Route frame to all enabled expert workers"""
@@ -479,37 +584,37 @@ class CentralWebSocketServer:
             }))
             return
         
-        # Send frame to enabled workers with same processing scale
-        scale_factor = get_processing_scale_from_config(self.config)
-        processed_frame = resize_frame_for_processing(frame, scale_factor)
-        
+        # Send frame (already at the processing scale) to enabled workers
         for worker_name in enabled_workers:
             worker = self.workers[worker_name]
-            await worker.add_job(camera_id, processed_frame, collect_result)
+            await worker.add_job(camera_id, frame, collect_result)
 
-    async def route_frame_to_expert(self, camera_id, frame, expert_type, websocket):
+    async def route_frame_to_expert(self, camera_id, frame, expert_type, websocket, request_id=None):
         """Route frame to specific expert worker"""
         if expert_type not in self.workers:
-            await websocket.send(json.dumps({"error": f"Expert '{expert_type}' not available"}))
+            await websocket.send(json.dumps({
+                "error": f"Expert '{expert_type}' not available",
+                "expert": expert_type.upper(),
+                "request_id": request_id
+            }))
             return
         
-        # Get processing scale from config (same for all experts)
-        scale_factor = get_processing_scale_from_config(self.config)
-        
-        # Resize frame for AI processing
-        processed_frame = resize_frame_for_processing(frame, scale_factor)
-        
         # Create callback to send result directly
         async def send_result(cam_id, worker_name, result):
             """Callback to send worker result directly"""
-            await websocket.send(json.dumps(result))
+            # Tag the reply so clients with several requests in flight can match it to their request
+            try:
+                await websocket.send(json.dumps(dict(result, expert=worker_name, request_id=request_id)))
+            except websockets.exceptions.ConnectionClosed:
+                pass  # Client went away; the dashboard still gets the result
             
-            # Store result for web dashboard
-            self.update_camera_data(cam_id, worker_name, result)
+            # Store result for web dashboard - a dropped frame has nothing to show
+            if not result.get("dropped"):
+                self.update_camera_data(cam_id, worker_name, result)
         
-        # Send processed frame to specific worker
+        # Send frame (already at the processing scale) to specific worker
         worker = self.workers[expert_type]
-        await worker.add_job(camera_id, processed_frame, send_result)
+        await worker.add_job(camera_id, frame, send_result)
 
     async def send_combined_result(self, websocket, camera_id, results):
         """Send combined results from all workers to client"""
@@ -557,15 +662,37 @@ class CentralWebSocketServer:
         # Update latest_results for frame overlays
         if camera_id not in self.latest_results:
             self.latest_results[camera_id] = {}
+        previous = self.latest_results[camera_id].get(worker_name) or {}
         self.latest_results[camera_id][worker_name] = result
         
+        # Only the drawn YOLO boxes change the stream; BLIP captions are never overlaid
+        if worker_name.lower() == 'yolo' and previous.get('detections') != result.get('detections'):
+            self.bump_camera_version(camera_id)
+        
         # Debug: print summary of data being stored
-        if 'fps' in result:
+        if self.debug_logging and 'fps' in result:
             print(f"🔍 Camera {camera_id} {worker_name}: FPS={result.get('fps', 'N/A')}")
         
         # Broadcast stats update to SocketIO clients
         self.broadcast_camera_stats(camera_id)
 
+    def bump_camera_version(self, camera_id):
+        """Mark a camera's stream output as changed and wake its streams"""
+        camera_id = str(camera_id)
+        with self.stream_changed:
+            self.camera_versions[camera_id] = self.camera_versions.get(camera_id, 0) + 1
+            self.stream_changed.notify_all()
+    
+    def notify_stream_change(self):
+        """Wake all streams, e.g. after a global model toggle"""
+        with self.stream_changed:
+            self.stream_changed.notify_all()
+    
+    def get_stream_state(self, camera_id):
+        """What a camera's stream output depends on: its version and the global model states"""
+        model_states = tuple(AI_MODELS[model]['enabled'] for model in AI_MODELS)
+        return (self.camera_versions.get(camera_id), model_states)
+
     def update_config_file(self, setting, value):
         """Update config file with new setting"""
         try:
@@ -634,15 +761,12 @@ class CentralWebSocketServer:
             }
             
             # Debug: Only print if there are actual results
-            if stats_data['results']:
+            if self.debug_logging and stats_data['results']:
                 print(f"📡 Broadcasting stats for camera {camera_id}: {list(stats_data['results'].keys())}")
             
-            # Emit to both the room and globally for debugging
+            # Emit once, to the dashboards subscribed to this camera
             self.socketio.emit('camera_stats_update', stats_data, room=room)
             
-            # Also emit globally for any clients that might be listening
-            self.socketio.emit('camera_stats_update', stats_data)
-            
         except Exception as e:
             print(f"❌ Error broadcasting stats for camera {camera_id}: {e}")
 
@@ -699,10 +823,12 @@ class CentralWebSocketServer:
         server_port = int(self.config.get("SERVER_PORT", 5000))
         
         # Start WebSocket server
+        # JPEG payloads do not compress - skip permessage-deflate on every frame
         server = await websockets.serve(
             self.handle_client,
             server_ip,
-            server_port
+            server_port,
+            compression=None
         )
         
         print(f"🚀 Central WebSocket Server running on {server_ip}:{server_port}")
@@ -1,6 +1,60 @@
 // Global state
 let aiModels = {};
 let toggleCooldowns = {}; // Track cooldown periods for each toggle
+let renderedHtml = {}; // Last HTML written per element id, to skip identical rewrites
+
+// Write text only when it differs so unchanged stats don't trigger layout work
+function setTextIfChanged(element, text) {
+	if (!element) return;
+	text = String(text);
+	if (element.textContent !== text) {
+		element.textContent = text;
+	}
+}
+
+// Render the detection list for a camera, skipping the DOM write if nothing changed
+function renderDetections(cameraId, detections) {
+	const container = document.getElementById(`detections-${cameraId}`);
+	if (!container) return;
+
+	const content = container.querySelector('div') || container;
+	let html;
+
+	if (detections.length === 0) {
+		html = '<div class="no-data">No detections</div>';
+	} else {
+		// Limit to 6 detections to prevent overflow on mobile
+		const limitedDetections = detections.slice(0, 6);
+
+		html = limitedDetections
+			.map(
+				(detection) => `
+					<div class="detection-item">
+						<span class="detection-class">${detection.class}</span>
+						<span class="detection-confidence">${(detection.confidence * 100).toFixed(
+							1
+						)}%</span>
+					</div>
+				`
+			)
+			.join('');
+
+		// Add overflow indicator if there are more detections
+		if (detections.length > 6) {
+			html += `<div class="detection-item">
+				<span class="detection-class" style="color: #8b949e; font-style: italic;">
+					+${detections.length - 6} more...
+				</span>
+			</div>`;
+		}
+	}
+
+	const key = `detections-${cameraId}`;
+	if (renderedHtml[key] !== html) {
+		content.innerHTML = html;
+		renderedHtml[key] = html;
+	}
+}
 
 // Toggle AI model globally with improved loading states
 async function toggleModel(modelName) {
@@ -112,6 +166,7 @@ function updateCameraDisplayForModelState(cameraId) {
 				const content =
 					detectionsContainer.querySelector('div') || detectionsContainer;
 				content.innerHTML = '<div class="no-data">YOLO disabled</div>';
+				renderedHtml[`detections-${cameraId}`] = content.innerHTML;
 			}
 		}
 	}
@@ -269,9 +324,10 @@ class DashboardClient {
 
 		// Update timestamp
 		const timestamp = new Date(data.timestamp * 1000).toLocaleTimeString();
-		document.getElementById(
-			`timestamp-${cameraId}`
-		).textContent = `Last update: ${timestamp}`;
+		setTextIfChanged(
+			document.getElementById(`timestamp-${cameraId}`),
+			`Last update: ${timestamp}`
+		);
 
 		// Update YOLO data - handle both 'yolo' and 'YOLO' keys
 		const yoloData = data.results.yolo || data.results.YOLO || {};
@@ -279,14 +335,18 @@ class DashboardClient {
 
 		// Only update if YOLO is enabled
 		if (aiModels.yolo.enabled) {
-			document.getElementById(`yolo-fps-${cameraId}`).textContent =
-				yoloData.fps || '-';
-			document.getElementById(`person-count-${cameraId}`).textContent =
-				yoloData.person_count || '0';
+			setTextIfChanged(
+				document.getElementById(`yolo-fps-${cameraId}`),
+				yoloData.fps || '-'
+			);
+			setTextIfChanged(
+				document.getElementById(`person-count-${cameraId}`),
+				yoloData.person_count || '0'
+			);
 			this.updateDetections(cameraId, yoloData.detections || []);
 		} else {
-			document.getElementById(`yolo-fps-${cameraId}`).textContent = '0.0';
-			document.getElementById(`person-count-${cameraId}`).textContent = '0';
+			setTextIfChanged(document.getElementById(`yolo-fps-${cameraId}`), '0.0');
+			setTextIfChanged(document.getElementById(`person-count-${cameraId}`), '0');
 			this.updateDetections(cameraId, []);
 		}
 
@@ -296,14 +356,20 @@ class DashboardClient {
 
 		// Only update if BLIP is enabled
 		if (aiModels.blip.enabled) {
-			document.getElementById(`blip-fps-${cameraId}`).textContent =
-				blipData.fps || '-';
-			document.getElementById(`caption-${cameraId}`).textContent =
-				blipData.caption || 'No caption available';
+			setTextIfChanged(
+				document.getElementById(`blip-fps-${cameraId}`),
+				blipData.fps || '-'
+			);
+			setTextIfChanged(
+				document.getElementById(`caption-${cameraId}`),
+				blipData.caption || 'No caption available'
+			);
 		} else {
-			document.getElementById(`blip-fps-${cameraId}`).textContent = '0.0';
-			document.getElementById(`caption-${cameraId}`).textContent =
-				'BLIP disabled';
+			setTextIfChanged(document.getElementById(`blip-fps-${cameraId}`), '0.0');
+			setTextIfChanged(
+				document.getElementById(`caption-${cameraId}`),
+				'BLIP disabled'
+			);
 		}
 	}
 
@@ -319,40 +385,7 @@ class DashboardClient {
 	}
 
 	updateDetections(cameraId, detections) {
-		const container = document.getElementById(`detections-${cameraId}`);
-		if (!container) return;
-
-		const content = container.querySelector('div') || container;
-
-		if (detections.length === 0) {
-			content.innerHTML = '<div class="no-data">No detections</div>';
-			return;
-		}
-
-		// Limit to 6 detections to prevent overflow on mobile
-		const limitedDetections = detections.slice(0, 6);
-
-		content.innerHTML = limitedDetections
-			.map(
-				(detection) => `
-					<div class="detection-item">
-						<span class="detection-class">${detection.class}</span>
-						<span class="detection-confidence">${(detection.confidence * 100).toFixed(
-							1
-						)}%</span>
-					</div>
-				`
-			)
-			.join('');
-
-		// Add overflow indicator if there are more detections
-		if (detections.length > 6) {
-			content.innerHTML += `<div class="detection-item">
-				<span class="detection-class" style="color: #8b949e; font-style: italic;">
-					+${detections.length - 6} more...
-				</span>
-			</div>`;
-		}
+		renderDetections(cameraId, detections);
 	}
 
 	async updateServerStats() {
@@ -396,6 +429,11 @@ class SocketIOStatsClient {
 	setupEventHandlers() {
 		this.socket.on('connect', () => {
 			console.log('📡 Connected to SocketIO server');
+
+			// Rooms do not survive a reconnect - join them again
+			this.subscribedCameras.forEach((cameraId) => {
+				this.socket.emit('subscribe_camera', { camera_id: cameraId });
+			});
 		});
 
 		this.socket.on('disconnect', () => {
@@ -448,7 +486,7 @@ class SocketIOStatsClient {
 		const timestampElement = document.getElementById(`timestamp-${cameraId}`);
 		if (timestampElement) {
 			const timestamp = new Date(data.timestamp * 1000).toLocaleTimeString();
-			timestampElement.textContent = `Last update: ${timestamp}`;
+			setTextIfChanged(timestampElement, `Last update: ${timestamp}`);
 		}
 
 		// Update YOLO data - only if enabled
@@ -462,9 +500,8 @@ class SocketIOStatsClient {
 
 		if (yoloFpsElement) {
 			if (aiModels.yolo.enabled) {
-				yoloFpsElement.textContent = yoloData.fps || '-';
-				if (personCountElement)
-					personCountElement.textContent = yoloData.person_count || '0';
+				setTextIfChanged(yoloFpsElement, yoloData.fps || '-');
+				setTextIfChanged(personCountElement, yoloData.person_count || '0');
 			} else {
 				yoloFpsElement.textContent = '0.0';
 				if (personCountElement) personCountElement.textContent = '0';
@@ -480,10 +517,11 @@ class SocketIOStatsClient {
 
 		if (blipFpsElement) {
 			if (aiModels.blip.enabled) {
-				blipFpsElement.textContent = blipData.fps || '-';
-				if (captionElement)
-					captionElement.textContent =
-						blipData.caption || 'No caption available';
+				setTextIfChanged(blipFpsElement, blipData.fps || '-');
+				setTextIfChanged(
+					captionElement,
+					blipData.caption || 'No caption available'
+				);
 			} else {
 				blipFpsElement.textContent = '0.0';
 				if (captionElement) captionElement.textContent = 'BLIP disabled';
@@ -499,40 +537,7 @@ class SocketIOStatsClient {
 	}
 
 	updateDetectionsRealtime(cameraId, detections) {
-		const container = document.getElementById(`detections-${cameraId}`);
-		if (!container) return;
-
-		const content = container.querySelector('div') || container;
-
-		if (detections.length === 0) {
-			content.innerHTML = '<div class="no-data">No detections</div>';
-			return;
-		}
-
-		// Limit to 6 detections to prevent overflow on mobile
-		const limitedDetections = detections.slice(0, 6);
-
-		content.innerHTML = limitedDetections
-			.map(
-				(detection) => `
-					<div class="detection-item">
-						<span class="detection-class">${detection.class}</span>
-						<span class="detection-confidence">${(detection.confidence * 100).toFixed(
-							1
-						)}%</span>
-					</div>
-				`
-			)
-			.join('');
-
-		// Add overflow indicator if there are more detections
-		if (detections.length > 6) {
-			content.innerHTML += `<div class="detection-item">
-				<span class="detection-class" style="color: #8b949e; font-style: italic;">
-					+${detections.length - 6} more...
-				</span>
-			</div>`;
-		}
+		renderDetections(cameraId, detections);
 	}
 }
 
@@ -555,6 +560,14 @@ DashboardClient = class extends originalDashboardClient {
 			this.socketIOClient.subscribeToCameraStats(cameraId);
 		});
 	}
+
+	async updateCameraData() {
+		// SocketIO pushes every update while connected - only poll as a fallback
+		if (this.socketIOClient && this.socketIOClient.socket.connected) {
+			return;
+		}
+		await super.updateCameraData();
+	}
 };
 
 // Live resolution control
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+# libjpeg-turbo bindings are optional - OpenCV's codec is used when they are missing
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+except ImportError:
+    TurboJPEG = None
+
+# Baseline 4:2:0 JPEG: half the chroma work of 4:4:4 and no extra optimize/progressive passes
+JPEG_ENCODE_FLAGS = [cv2.IMWRITE_JPEG_OPTIMIZE, 0, cv2.IMWRITE_JPEG_PROGRESSIVE, 0]
+if hasattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR"):
+    JPEG_ENCODE_FLAGS += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420]
+
+def load_turbo_jpeg():
+    """Load libjpeg-turbo if PyTurboJPEG and the shared library are installed"""
+    if TurboJPEG is None:
+        return None
+    
+    try:
+        return TurboJPEG()
+    except Exception as e:
+        print(f"⚠️  libjpeg-turbo unavailable, using OpenCV JPEG codec: {e}")
+        return None
+
+turbo_jpeg = load_turbo_jpeg()
+
+def encode_jpeg(frame, quality=85):
+    """Encode a BGR frame as a bytes-like JPEG buffer (None if encoding failed)"""
+    if turbo_jpeg is not None:
+        return turbo_jpeg.encode(frame, quality=quality, jpeg_subsample=TJSAMP_420)
+    
+    # Hand out a view of OpenCV's buffer instead of copying it into bytes
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality] + JPEG_ENCODE_FLAGS)
+    return memoryview(buffer) if ret else None
+
+def decode_jpeg(jpeg_bytes):
+    """Decode JPEG bytes into a BGR frame (None if the data is not a valid image)"""
+    if turbo_jpeg is not None:
+        try:
+            return turbo_jpeg.decode(jpeg_bytes)
+        except Exception:
+            # Not a JPEG libjpeg-turbo can read - let OpenCV try (it also handles PNG etc.)
+            pass
+    
+    return cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_COLOR)
\ No newline at end of file
@@ -0,0 +1,29 @@
+import cv2
+import numpy as np
+
+def average_hash(frame, hash_size=8):
+    """Compute a 64-bit average hash (aHash) of a BGR frame for cheap change detection"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (hash_size, hash_size), interpolation=cv2.INTER_AREA)
+    
+    # One bit per pixel: brighter or darker than the thumbnail mean
+    bits = np.packbits(small > small.mean())
+    return int.from_bytes(bits.tobytes(), "big")
+
+def gray_thumbnail(frame, size=(32, 32)):
+    """Small grayscale thumbnail of a BGR frame for cheap frame-difference checks"""
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+def frame_difference(thumb_a, thumb_b):
+    """Mean absolute pixel difference between two thumbnails (0-255)"""
+    return float(cv2.absdiff(thumb_a, thumb_b).mean())
+
+def hamming_distance(hash_a, hash_b):
+    """Count the differing bits between two hashes"""
+    diff = hash_a ^ hash_b
+    
+    # int.bit_count() (Python 3.10+) is a native popcount; fall back to string counting
+    if hasattr(diff, "bit_count"):
+        return diff.bit_count()
+    return bin(diff).count("1")
\ No newline at end of file
@@ -1,8 +1,12 @@
 import cv2
 import numpy as np
+from functools import lru_cache
 
-def resize_frame_for_processing(frame, scale_factor):
-    """Resize frame for AI processing based on scale factor"""
+# BGR box colors, cycled per detection
+DETECTION_COLORS = ((0, 255, 0), (255, 0, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255))
+
+def resize_frame_for_processing(frame, scale_factor, dst=None):
+    """Resize frame for AI processing based on scale factor (into dst if it has the target shape)"""
     if frame is None or scale_factor <= 0:
         return frame
     
@@ -12,8 +16,16 @@ def resize_frame_for_processing(frame, scale_factor):
     new_width = int(current_width * scale_factor)
     new_height = int(current_height * scale_factor)
     
-    # Always resize to ensure AI models process the scaled frames
-    frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    # Already at the target size (scale 1.0) - skip the full-frame copy
+    if new_width == current_width and new_height == current_height:
+        return frame
+    
+    # Reuse the caller's buffer only if it matches; otherwise let OpenCV allocate
+    if dst is not None and (dst.shape != (new_height, new_width) + frame.shape[2:] or dst.dtype != frame.dtype):
+        dst = None
+    
+    # Resize to ensure AI models process the scaled frames
+    frame = cv2.resize(frame, (new_width, new_height), dst=dst, interpolation=cv2.INTER_AREA)
     
     return frame
 
@@ -81,24 +93,25 @@ def scale_bounding_boxes_from_processed_to_display(detections, processing_scale,
     # However, if the display frame has a different aspect ratio or size,
     # we need to account for that
     
+    # For now, assume the coordinates match (both frames scaled by same factor)
+    # This is the correct behavior when both frames use the same processing_scale
+    # Truncate every box to integer pixels in one numpy pass
+    int_bboxes = np.asarray([detection["bbox"] for detection in detections]).astype(np.int32).tolist()
+    
     scaled_detections = []
-    for detection in detections:
+    for detection, bbox in zip(detections, int_bboxes):
         scaled_detection = detection.copy()
-        bbox = detection["bbox"]
-        
-        # For now, assume the coordinates match (both frames scaled by same factor)
-        # This is the correct behavior when both frames use the same processing_scale
-        scaled_detection["bbox"] = [
-            int(bbox[0]),  # x1
-            int(bbox[1]),  # y1
-            int(bbox[2]),  # x2
-            int(bbox[3])   # y2
-        ]
-        
+        scaled_detection["bbox"] = bbox  # [x1, y1, x2, y2]
         scaled_detections.append(scaled_detection)
     
     return scaled_detections
 
+@lru_cache(maxsize=1024)
+def get_label_size(label):
+    """Measure a detection label once; labels repeat from frame to frame"""
+    (text_width, text_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+    return text_width, text_height
+
 def draw_detections_on_frame(frame, detections, colors=None):
     """
     Draw detection bounding boxes on a frame.
@@ -115,21 +128,28 @@ def draw_detections_on_frame(frame, detections, colors=None):
         return frame
     
     if colors is None:
-        colors = [(0, 255, 0), (255, 0, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255)]
+        colors = DETECTION_COLORS
+    
+    # Draw bounding boxes with one polylines call per color
+    bboxes = np.asarray([detection["bbox"] for detection in detections], dtype=np.int32)
+    x1, y1, x2, y2 = bboxes[:, 0], bboxes[:, 1], bboxes[:, 2], bboxes[:, 3]
+    corners = np.stack([
+        np.stack([x1, y1], axis=1), np.stack([x2, y1], axis=1),
+        np.stack([x2, y2], axis=1), np.stack([x1, y2], axis=1)
+    ], axis=1)
+    for color_index in range(min(len(colors), len(detections))):
+        cv2.polylines(frame, list(corners[color_index::len(colors)]), True, colors[color_index], 3)
     
     for i, detection in enumerate(detections):
-        bbox = detection["bbox"]
+        bbox = bboxes[i].tolist()
         class_name = detection["class"]
         confidence = detection["confidence"]
         
         color = colors[i % len(colors)]
         
-        # Draw bounding box
-        cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 3)
-        
         # Draw label
         label = f"{class_name} {confidence:.2f}"
-        (text_width, text_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        text_width, text_height = get_label_size(label)
         cv2.rectangle(frame, (bbox[0], bbox[1] - text_height - 10),
                      (bbox[0] + text_width + 10, bbox[1]), color, -1)
         cv2.putText(frame, label, (bbox[0] + 5, bbox[1] - 5),